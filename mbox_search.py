@@ -11,17 +11,61 @@ Copyright (c) 2025 J.F. Durocher (jf@durocher.in)
 
 import os
 import sys
-import mailbox
+import mmap
+import codecs
+import unicodedata
 from typing import List, Dict, Optional
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.panel import Panel
 from rich.table import Table
 import re
+from email.parser import BytesParser
+from email.policy import compat32
 from email.utils import parsedate_to_datetime
 
+# Start of each message in an mbox file
+_FROM_RE = re.compile(rb'^From ', re.MULTILINE)
+
+@lru_cache(maxsize=None)
+def _codec_name(charset: str) -> Optional[str]:
+    """
+    Return the codec for a declared charset, or None if Python doesn't know it
+    as a text encoding (e.g. 'base64' or 'zlib' are bytes-to-bytes codecs).
+    """
+    try:
+        info = codecs.lookup(charset)
+    except LookupError:
+        return None
+    # The same flag bytes.decode() checks before refusing a non-text codec
+    if not getattr(info, '_is_text_encoding', True):
+        return None
+    return info.name
+
+def _fold(text: str) -> str:
+    """Normalize text for case-insensitive matching (NFKC, then Unicode case folding)."""
+    return unicodedata.normalize('NFKC', text).casefold()
+
+def _map_file(path: str) -> mmap.mmap:
+    """
+    Map a file read-only for a single front-to-back pass.
+
+    The kernel is told about the access pattern so it reads ahead
+    aggressively; the hints are skipped on platforms that don't provide them.
+    """
+    with open(path, 'rb') as f:
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # No MADV_WILLNEED: on a file larger than RAM, queueing readahead for the
+    # whole mapping would evict the pages the scan is about to read
+    if hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
+
 @dataclass
 class EmailMessage:
     """Data class to store email message information."""
@@ -30,6 +74,9 @@ class EmailMessage:
     from_addr: str
     date: datetime
     body: str
+    # Search keys: _fold()ed subject and body encoded as UTF-8
+    subject_key: bytes
+    body_key: bytes
 
 class MBoxSearcher:
     """Main class for handling mbox file operations and searching."""
@@ -44,6 +91,7 @@ class MBoxSearcher:
         self.mbox_path = mbox_path
         self.console = Console()
         self.messages: List[EmailMessage] = []
+        self.unknown_charsets = set()
         
     def load_mbox(self) -> None:
         """Load and parse the mbox file with progress indication."""
@@ -52,8 +100,21 @@ class MBoxSearcher:
             sys.exit(1)
             
         try:
-            mbox = mailbox.mbox(self.mbox_path)
-            total_messages = len(mbox)
+            if os.path.getsize(self.mbox_path) == 0:
+                self.console.print("\n[green]Successfully loaded 0 messages[/green]")
+                return
+
+            mm = _map_file(self.mbox_path)
+            # Split on From_ lines in a single regex pass over the mapped file
+            offsets = [match.start() for match in _FROM_RE.finditer(mm)]
+            offsets.append(len(mm))
+            total_messages = len(offsets) - 1
+            # One parser for the whole file; compat32 is all display needs.
+            # The loop below runs once per message, so bind what it calls to locals.
+            parse = BytesParser(policy=compat32).parsebytes
+            parse_date = parsedate_to_datetime
+            get_body = self._get_message_body
+            add_message = self.messages.append
             
             with Progress(
                 SpinnerColumn(),
@@ -62,26 +123,35 @@ class MBoxSearcher:
             ) as progress:
                 task = progress.add_task("Loading messages...", total=total_messages)
                 
-                for message in mbox:
+                for start, end in zip(offsets, offsets[1:]):
+                    message = parse(mm[start:end])
                     # Parse the date header safely
                     date_header = message.get('Date', '')
                     date_obj = None
                     if date_header:
                         try:
-                            date_obj = parsedate_to_datetime(date_header)
+                            date_obj = parse_date(date_header)
                         except Exception:
                             date_obj = None
-                    email = EmailMessage(
-                        message_id=message.get('Message-ID', ''),
-                        subject=message.get('Subject', ''),
-                        from_addr=message.get('From', ''),
+                    # Coerce headers to str once so searching never has to
+                    subject = str(message.get('Subject', ''))
+                    body = str(get_body(message))
+                    email_message = EmailMessage(
+                        message_id=str(message.get('Message-ID', '')),
+                        subject=subject,
+                        from_addr=str(message.get('From', '')),
                         date=date_obj,
-                        body=self._get_message_body(message)
+                        body=body,
+                        subject_key=_fold(subject).encode('utf-8', 'surrogatepass'),
+                        body_key=_fold(body).encode('utf-8', 'surrogatepass')
                     )
-                    self.messages.append(email)
+                    add_message(email_message)
                     progress.update(task, advance=1)
-                    
+
+            mm.close()
             self.console.print(f"\n[green]Successfully loaded {len(self.messages)} messages[/green]")
+            if self.unknown_charsets:
+                self.console.print(f"[yellow]Unknown charsets decoded as UTF-8: {', '.join(sorted(self.unknown_charsets))}[/yellow]")
             
         except Exception as e:
             self.console.print(f"[red]Error loading mbox file: {str(e)}[/red]")
@@ -101,16 +171,37 @@ class MBoxSearcher:
         if message.is_multipart():
             for part in message.walk():
                 if part.get_content_type() == "text/plain":
-                    try:
-                        body += part.get_payload(decode=True).decode()
-                    except:
-                        continue
+                    body += self._decode_part(part)
         else:
-            try:
-                body = message.get_payload(decode=True).decode()
-            except:
-                body = message.get_payload()
+            body = self._decode_part(message)
         return body
+
+    def _decode_part(self, part) -> str:
+        """
+        Decode a single message part using its declared charset.
+
+        Undecodable bytes are replaced rather than raising, and charsets Python
+        doesn't know fall back to UTF-8 and are reported once after loading.
+        
+        Args:
+            part: A non-multipart email message part
+            
+        Returns:
+            str: The decoded text
+        """
+        payload = part.get_payload(decode=True)
+        if payload is None:
+            return ""
+        charset = part.get_content_charset() or 'utf-8'
+        codec = _codec_name(charset)
+        if codec is not None:
+            try:
+                return payload.decode(codec, errors='replace')
+            except UnicodeError:
+                # A few text codecs (idna, punycode) raise despite errors='replace'
+                pass
+        self.unknown_charsets.add(charset)
+        return payload.decode('utf-8', errors='replace')
     
     def search(self, query: str, search_subject: bool = True, search_body: bool = True) -> List[EmailMessage]:
         """
@@ -124,18 +215,12 @@ class MBoxSearcher:
         Returns:
             List[EmailMessage]: List of matching messages
         """
-        query = query.lower()
+        # Searchable fields are stored as case-folded UTF-8; compare bytes to bytes
+        query = _fold(query).encode('utf-8', 'surrogatepass')
         results = []
         
         for message in self.messages:
-            match = False
-            subject = str(message.subject) if not isinstance(message.subject, str) else message.subject
-            body = str(message.body) if not isinstance(message.body, str) else message.body
-            if search_subject and query in subject.lower():
-                match = True
-            if search_body and query in body.lower():
-                match = True
-            if match:
+            if (search_subject and query in message.subject_key) or (search_body and query in message.body_key):
                 results.append(message)
                 
         return results
@@ -11,122 +11,490 @@ Copyright (c) 2025 J.F. Durocher (jf@durocher.in)
 
 import os
 import sys
-import mailbox
-from typing import List, Optional
-from dataclasses import dataclass
+import mmap
+import codecs
+import unicodedata
+import multiprocessing
+import pickle
+import hashlib
+import time
+from array import array
+from bisect import bisect_right
+from itertools import chain
+from functools import lru_cache
+from typing import Callable, List, Optional, Set, Tuple
+from dataclasses import dataclass, field, replace
 from datetime import datetime
+from email.parser import BytesParser, BytesHeaderParser
+from email.policy import compat32
 from email.utils import parsedate_to_datetime
+from concurrent.futures import ProcessPoolExecutor
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QLineEdit, QFileDialog, QTableWidget,
-    QTableWidgetItem, QHeaderView, QMessageBox, QProgressBar,
+    QPushButton, QLabel, QLineEdit, QFileDialog, QTableView,
+    QHeaderView, QMessageBox, QProgressBar,
     QComboBox, QTextEdit, QSplitter, QMenuBar, QMenu, QStatusBar
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QAbstractTableModel, QModelIndex
 from PyQt6.QtGui import QFont, QIcon, QAction, QKeySequence
 import re
 
+# Start of each message in an mbox file
+_FROM_RE = re.compile(rb'^From ', re.MULTILINE)
+
+# Shared full-message parser, pre-bound for the per-message hot paths. compat32
+# skips the RFC-strict header handling of the newer policies, which
+# display-only use doesn't need.
+_parse_bytes = BytesParser(policy=compat32).parsebytes
+
+# Blank line separating a message's headers from its body
+_HEADER_END_RE = re.compile(rb'\r?\n\r?\n')
+
+# Anything that looks like an HTML tag in a message body
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# Messages handed to a parser worker per pickled task
+PARSE_CHUNK_SIZE = 64
+
+# Windows' ProcessPoolExecutor refuses more than 61 workers
+MAX_PARSE_WORKERS = 61
+
+# Bytes sampled from the start of a file to estimate its message count
+ESTIMATE_SAMPLE_SIZE = 8 * 1024 * 1024
+
+# Minimum time between progress updates sent to the UI (about 60 Hz)
+PROGRESS_INTERVAL = 1 / 60
+
+# Parsed mailboxes are cached here between runs; bump the version whenever
+# the layout of MessageStore changes so stale caches are ignored.
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'qdmboxsearch')
+CACHE_VERSION = 9
+
 @dataclass
 class EmailMessage:
-    """Data class to store email message information."""
+    """Data class to store the header fields of an email message."""
     message_id: str
     subject: str
     from_addr: str
     date: datetime
-    body: str
+    # Search key: _fold()ed subject encoded as UTF-8
+    subject_key: bytes
+
+@dataclass
+class MessageStore:
+    """
+    Loaded messages as parallel columns rather than one object per message.
+
+    Index i refers to the same message in every list. Bodies are not kept:
+    starts/ends locate each message in the mbox file so the preview can decode
+    it on demand. For searching, build_body_index() packs the case-folded bodies
+    into one NUL-separated UTF-8 blob, which is the only copy retained, so a
+    body search is a single bytes.find loop.
+    """
+    dates: List[Optional[datetime]] = field(default_factory=list)
+    from_addrs: List[str] = field(default_factory=list)
+    subjects: List[str] = field(default_factory=list)
+    subject_keys: List[bytes] = field(default_factory=list)
+    starts: array = field(default_factory=lambda: array('Q'))
+    ends: array = field(default_factory=lambda: array('Q'))
+    body_blob: bytes = b''
+    body_offsets: array = field(default_factory=lambda: array('Q'))
+
+    def __len__(self) -> int:
+        return len(self.subjects)
+
+    @property
+    def has_body_index(self) -> bool:
+        """Whether message bodies have been decoded and indexed yet."""
+        return len(self.body_offsets) > 0
+
+    def append(self, message: EmailMessage, start: int, end: int) -> None:
+        """Add a message's headers and its location in the mbox file."""
+        self.dates.append(message.date)
+        self.from_addrs.append(message.from_addr)
+        self.subjects.append(message.subject)
+        self.subject_keys.append(message.subject_key)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def build_body_index(self, body_keys: List[bytes]) -> None:
+        """Pack case-folded UTF-8 bodies into body_blob, recording where each one starts."""
+        offsets = array('Q')
+        pos = 0
+        for body in body_keys:
+            offsets.append(pos)
+            pos += len(body) + 1
+        # Sentinel: where the body after the last one would start
+        offsets.append(pos)
+        self.body_offsets = offsets
+        self.body_blob = b'\x00'.join(body_keys)
+
+    def search_bodies(self, needle: bytes) -> List[int]:
+        """Return the indices of messages whose case-folded UTF-8 body contains needle."""
+        if not self.has_body_index or not len(self):
+            return []
+        return self.scan_bodies(needle)
+
+    def scan_bodies(self, needle: bytes) -> List[int]:
+        """Find needle with a linear scan of body_blob, reporting each message once."""
+        blob = self.body_blob
+        offsets = self.body_offsets
+        results = []
+        pos = blob.find(needle)
+        while pos != -1:
+            index = bisect_right(offsets, pos) - 1
+            results.append(index)
+            # Skip the rest of this body; one hit per message is enough
+            pos = blob.find(needle, offsets[index + 1])
+        return results
+
+def _fold(text: str) -> str:
+    """Normalize text for case-insensitive matching (NFKC, then Unicode case folding)."""
+    return unicodedata.normalize('NFKC', text).casefold()
+
+def _parse_headers(parse_bytes: Callable, raw_headers: bytes) -> EmailMessage:
+    """Parse the header block of a message into an EmailMessage using parse_bytes."""
+    message = parse_bytes(raw_headers)
+
+    # Parse the date header safely
+    date_header = message.get('Date', '')
+    date_obj = None
+    if date_header:
+        try:
+            date_obj = parsedate_to_datetime(date_header)
+        except Exception:
+            date_obj = None
+
+    # Headers may come back as Header objects; coerce everything to str once here
+    subject = str(message.get('Subject', ''))
+    return EmailMessage(
+        message_id=str(message.get('Message-ID', '')),
+        subject=subject,
+        from_addr=str(message.get('From', '')),
+        date=date_obj,
+        subject_key=_fold(subject).encode('utf-8', 'surrogatepass')
+    )
+
+@lru_cache(maxsize=None)
+def _codec_name(charset: str) -> Optional[str]:
+    """
+    Return the codec for a declared charset, or None if Python doesn't know it
+    as a text encoding (e.g. 'base64' or 'zlib' are bytes-to-bytes codecs).
+    """
+    try:
+        info = codecs.lookup(charset)
+    except LookupError:
+        return None
+    # The same flag bytes.decode() checks before refusing a non-text codec
+    if not getattr(info, '_is_text_encoding', True):
+        return None
+    return info.name
+
+def _decode_part(part, unknown_charsets: Optional[Set[str]] = None) -> str:
+    """
+    Decode a single non-multipart part using its declared charset.
+
+    Never raises: undecodable bytes are replaced and unknown charsets fall
+    back to UTF-8, so a bad part costs no exception in the load loop. Charsets
+    that needed the fallback are added to unknown_charsets, if given.
+    """
+    payload = part.get_payload(decode=True)
+    if payload is None:
+        return ""
+    charset = part.get_content_charset() or 'utf-8'
+    codec = _codec_name(charset)
+    if codec is not None:
+        try:
+            return payload.decode(codec, errors='replace')
+        except UnicodeError:
+            # A few text codecs (idna, punycode) raise despite errors='replace'
+            pass
+    if unknown_charsets is not None:
+        unknown_charsets.add(charset)
+    return payload.decode('utf-8', errors='replace')
+
+def _message_body(message, unknown_charsets: Optional[Set[str]] = None) -> str:
+    """Extract the displayable body of a message, preferring its HTML part."""
+    if not message.is_multipart():
+        return _decode_part(message, unknown_charsets)
+
+    # Decide which parts to show before decoding anything, so the plain text
+    # alternative of an HTML message is never decoded just to be thrown away
+    parts = [part for part in message.walk() if part.get_content_type() == "text/html"]
+    if not parts:
+        parts = [part for part in message.walk() if part.get_content_type() == "text/plain"]
+    return "".join(_decode_part(part, unknown_charsets) for part in parts)
+
+# The mbox file as mapped inside a parser worker process
+_worker_mm: Optional[mmap.mmap] = None
+
+def _init_worker(mbox_path: str) -> None:
+    """
+    Map the mbox file once in each parser worker process.
+
+    Every worker maps the same file, so they all share the OS page cache and
+    only message offsets need to cross the process boundary.
+    """
+    global _worker_mm
+    _worker_mm = _map_file(mbox_path)
+
+def _parse_body(span: Tuple[int, int]) -> Tuple[bytes, Set[str]]:
+    """
+    Decode the message at span and return its case-folded body as UTF-8 for
+    searching, along with any charsets that had to fall back to UTF-8.
+
+    Runs in a worker process, so it must stay at module level to be picklable.
+    """
+    start, end = span
+    unknown_charsets = set()
+    body = _message_body(_parse_bytes(_worker_mm[start:end]), unknown_charsets)
+    return _fold(body).encode('utf-8', 'surrogatepass'), unknown_charsets
+
+def _map_file(path: str, sequential: bool = False) -> mmap.mmap:
+    """
+    Map a file read-only.
+
+    With sequential=True the kernel is told the mapping will be read front to
+    back, so it reads ahead aggressively. The hints are skipped on platforms
+    that don't provide them.
+    """
+    with open(path, 'rb') as f:
+        if sequential and hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # No MADV_WILLNEED: on a file larger than RAM, queueing readahead for the
+    # whole mapping would evict the pages the scan is about to read
+    if sequential and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
+
+def _cache_path(mbox_path: str) -> str:
+    """Return the cache file used for the given mbox file."""
+    digest = hashlib.sha1(os.path.abspath(mbox_path).encode('utf-8', 'surrogatepass')).hexdigest()
+    return os.path.join(CACHE_DIR, f"{digest}.pkl")
+
+def _load_cached_store(mbox_path: str, key: Tuple[int, int]) -> Optional[MessageStore]:
+    """
+    Load a previously parsed mailbox from the cache.
+
+    Returns None unless the cache was written for the same mbox modification
+    time and size by the same cache version.
+    """
+    try:
+        with open(_cache_path(mbox_path), 'rb') as f:
+            # The header is pickled separately so a stale cache is rejected
+            # without deserializing the whole store.
+            if pickle.load(f) != (CACHE_VERSION, key):
+                return None
+            return pickle.load(f)
+    except Exception:
+        # A missing, corrupt or incompatible cache just means a full parse
+        return None
+
+def _save_cached_store(mbox_path: str, key: Tuple[int, int], store: MessageStore) -> None:
+    """Write a parsed mailbox to the cache, ignoring any failure to do so."""
+    path = _cache_path(mbox_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((CACHE_VERSION, key), f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(store, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
 
 class MBoxLoader(QThread):
-    """Thread for loading mbox file to prevent UI freezing."""
+    """
+    Thread for loading mbox file to prevent UI freezing.
+
+    Headers are parsed first and handed over through headers_loaded so the
+    message list is usable right away; bodies are then decoded in a process
+    pool and the fully indexed store is delivered through finished. Charsets
+    that had to be decoded as UTF-8 are collected in unknown_charsets.
+
+    Once requestInterruption() is called the loader stops at the next message,
+    emits nothing further and leaves the cache alone.
+    """
     progress = pyqtSignal(int)
     status = pyqtSignal(str)
-    finished = pyqtSignal(list)
+    headers_loaded = pyqtSignal(object)
+    finished = pyqtSignal(object)
     error = pyqtSignal(str)
 
     def __init__(self, mbox_path: str):
         super().__init__()
         self.mbox_path = mbox_path
+        self.unknown_charsets: Set[str] = set()
+        self._last_emit = 0.0
+        self._last_percent = -1
+
+    def _throttled(self, done: int, total: int) -> bool:
+        """
+        Whether a progress update for done/total should be skipped.
+
+        Updates only go out when the percentage changes or PROGRESS_INTERVAL
+        has passed, so per-message calls don't flood the UI thread.
+        """
+        now = time.monotonic()
+        percent = done * 100 // total
+        if percent == self._last_percent and now - self._last_emit < PROGRESS_INTERVAL and done < total:
+            return True
+        self._last_emit = now
+        self._last_percent = percent
+        return False
+
+    def report_header_progress(self, bytes_read: int, file_size: int, messages_read: int, estimated_count: str):
+        """Fill the first half of the bar by how far into the file header parsing has got."""
+        if self._throttled(bytes_read, file_size):
+            return
+        self.progress.emit(bytes_read * 50 // file_size)
+        self.status.emit(f"Loading message {messages_read} of {estimated_count} ({bytes_read/file_size*100:.1f}%)")
+
+    def report_body_progress(self, indexed: int, message_count: int):
+        """Fill the second half of the bar by the number of bodies decoded so far."""
+        if self._throttled(indexed, message_count):
+            return
+        self.progress.emit(50 + indexed * 50 // message_count)
+        self.status.emit(f"Indexing message {indexed} of {message_count} ({indexed/message_count*100:.1f}%)")
 
     def run(self):
         try:
-            self.status.emit("Scanning file for messages...")
-            # First pass: count messages and estimate progress
-            message_count = 0
-            file_size = os.path.getsize(self.mbox_path)
-            bytes_processed = 0
-            chunk_size = 1024 * 1024  # 1MB chunks
-            
-            with open(self.mbox_path, 'rb') as f:
-                while True:
-                    chunk = f.read(chunk_size)
-                    if not chunk:
+            stat = os.stat(self.mbox_path)
+            if stat.st_size == 0:
+                store = MessageStore()
+                store.build_body_index([])
+                self.finished.emit(store)
+                return
+
+            # Reuse the previous parse if the mailbox hasn't changed since
+            cache_key = (stat.st_mtime_ns, stat.st_size)
+            store = _load_cached_store(self.mbox_path, cache_key)
+            if store is not None:
+                self.progress.emit(100)
+                self.finished.emit(store)
+                return
+
+            # Map the whole file read-only; pages are faulted in on demand,
+            # so we avoid copying the mailbox through Python buffers twice.
+            mm = _map_file(self.mbox_path, sequential=True)
+
+            # Rather than reading the whole file just to count messages, estimate
+            # the count from a sample and drive the progress bar by bytes read
+            file_size = len(mm)
+            sample_size = min(file_size, ESTIMATE_SAMPLE_SIZE)
+            sample_count = len(_FROM_RE.findall(mm, 0, sample_size))
+            estimated_count = f"~{file_size * sample_count // sample_size}"
+
+            # First pass: headers only, which is all the message list needs.
+            # Message boundaries are found as we go, in the same pass.
+            store = MessageStore()
+            spans = []
+            # This is the hottest loop in the loader: build the parser once and
+            # bind everything it calls to locals to avoid per-message lookups
+            parse_headers = BytesHeaderParser(policy=compat32).parsebytes
+            find_header_end = _HEADER_END_RE.search
+            add_message = store.append
+            add_span = spans.append
+            report_header_progress = self.report_header_progress
+            interrupted = self.isInterruptionRequested
+            start = None
+            boundaries = chain((match.start() for match in _FROM_RE.finditer(mm)), (file_size,))
+            for end in boundaries:
+                if interrupted():
+                    mm.close()
+                    return
+                if start is not None:
+                    header_end = find_header_end(mm, start, end)
+                    raw_headers = mm[start:header_end.end() if header_end else end]
+                    add_message(_parse_headers(parse_headers, raw_headers), start, end)
+                    add_span((start, end))
+                    report_header_progress(bytes_read=end, file_size=file_size,
+                                           messages_read=len(spans), estimated_count=estimated_count)
+                start = end
+            message_count = len(spans)
+            self.headers_loaded.emit(store)
+
+            # Second pass: MIME decoding is pure CPU work, so fan it out across processes
+            body_keys = []
+            workers = min(os.cpu_count() or 1, MAX_PARSE_WORKERS)
+            # Spawn rather than fork: forking this multi-threaded Qt process can
+            # deadlock the child, and spawn is what Windows and macOS use anyway
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_worker, initargs=(self.mbox_path,)) as executor:
+                for body, unknown_charsets in executor.map(_parse_body, spans, chunksize=PARSE_CHUNK_SIZE):
+                    if interrupted():
+                        # Drop the queued chunks rather than waiting for them on exit
+                        executor.shutdown(wait=False, cancel_futures=True)
                         break
-                    bytes_processed += len(chunk)
-                    # Look for message boundaries in the chunk
-                    message_count += chunk.count(b'\nFrom ')
-                    # Update progress based on file size
-                    progress = int((bytes_processed / file_size) * 50)  # First 50% for scanning
-                    self.progress.emit(progress)
-            
-            self.status.emit(f"Found {message_count} messages. Loading content...")
-            
-            # Second pass: load messages
-            mbox = mailbox.mbox(self.mbox_path)
-            messages = []
-            current_message = 0
-            
-            for message in mbox:
-                # Parse the date header safely
-                date_header = message.get('Date', '')
-                date_obj = None
-                if date_header:
-                    try:
-                        date_obj = parsedate_to_datetime(date_header)
-                    except Exception:
-                        date_obj = None
-
-                # Get message body
-                body = ""
-                html_body = ""
-                if message.is_multipart():
-                    for part in message.walk():
-                        content_type = part.get_content_type()
-                        if content_type == "text/plain":
-                            try:
-                                body += part.get_payload(decode=True).decode()
-                            except:
-                                continue
-                        elif content_type == "text/html":
-                            try:
-                                html_body += part.get_payload(decode=True).decode()
-                            except:
-                                continue
-                else:
-                    try:
-                        if message.get_content_type() == "text/html":
-                            html_body = message.get_payload(decode=True).decode()
-                        else:
-                            body = message.get_payload(decode=True).decode()
-                    except:
-                        body = message.get_payload()
-
-                email = EmailMessage(
-                    message_id=message.get('Message-ID', ''),
-                    subject=message.get('Subject', ''),
-                    from_addr=message.get('From', ''),
-                    date=date_obj,
-                    body=html_body if html_body else body
-                )
-                messages.append(email)
-                current_message += 1
-                # Second 50% for loading messages
-                progress = 50 + int((current_message / message_count) * 50)
-                self.progress.emit(progress)
-                self.status.emit(f"Loading message {current_message} of {message_count} ({current_message/message_count*100:.1f}%)")
-
-            self.finished.emit(messages)
+                    body_keys.append(body)
+                    self.unknown_charsets.update(unknown_charsets)
+                    self.report_body_progress(indexed=len(body_keys), message_count=message_count)
+
+            mm.close()
+            if interrupted():
+                return
+            # The UI already holds the header-only store, so finish on a copy
+            store = replace(store)
+            store.build_body_index(body_keys)
+            del body_keys  # the packed blob is the only copy we keep
+            self.finished.emit(store)
+            # The store is final, so the UI needn't wait for the cache write
+            _save_cached_store(self.mbox_path, cache_key, store)
         except Exception as e:
             self.error.emit(str(e))
 
+class MessageTableModel(QAbstractTableModel):
+    """
+    Table model showing a list of search results straight from a MessageStore.
+
+    Cells are produced on demand for the rows Qt actually paints, so no item
+    objects are allocated per result.
+    """
+    HEADERS = ["Date", "From", "Subject"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._store = MessageStore()
+        self._results: List[int] = []
+
+    def set_results(self, store: MessageStore, results: List[int]):
+        """Show the given message indices from store."""
+        self.beginResetModel()
+        self._store = store
+        self._results = results
+        self.endResetModel()
+
+    def message_index(self, row: int) -> int:
+        """Return the message store index shown in the given row."""
+        return self._results[row]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._results)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        message = self._results[index.row()]
+        column = index.column()
+        if column == 0:
+            date = self._store.dates[message]
+            return date.strftime("%Y-%m-%d %H:%M") if date else "Unknown"
+        if column == 1:
+            return self._store.from_addrs[message]
+        return self._store.subjects[message]
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
 class MainWindow(QMainWindow):
     """Main window of the application."""
     
@@ -139,7 +507,13 @@ class MainWindow(QMainWindow):
             self.setWindowIcon(QIcon(os.path.join(os.path.dirname(__file__), 'icon.ico')))
         else:
             self.setWindowIcon(QIcon(os.path.join(os.path.dirname(__file__), 'icon.png')))
-        self.messages: List[EmailMessage] = []
+        self.store = MessageStore()
+        self.mbox_path: Optional[str] = None
+        self._mm: Optional[mmap.mmap] = None
+        self._body_cache = None
+        self.loader: Optional[MBoxLoader] = None
+        # Superseded loaders still running; kept referenced until they exit
+        self._retired_loaders: List[MBoxLoader] = []
         self.init_ui()
         self.create_menu_bar()
 
@@ -279,12 +653,12 @@ class MainWindow(QMainWindow):
         splitter = QSplitter(Qt.Orientation.Vertical)
         
         # Results table
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(3)
-        self.results_table.setHorizontalHeaderLabels(["Date", "From", "Subject"])
+        self.results_model = MessageTableModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
         self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-        self.results_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.results_table.itemSelectionChanged.connect(self.show_selected_message)
+        self.results_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.results_table.selectionModel().selectionChanged.connect(self.show_selected_message)
         splitter.addWidget(self.results_table)
 
         # Message preview
@@ -316,83 +690,135 @@ class MainWindow(QMainWindow):
         self.progress_bar.setValue(0)
         self.statusBar().showMessage("Initializing...")
         
+        # Drop the mapping of the previously opened file, if any
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self.mbox_path = file_path
+        self.store = MessageStore()
+        # Rows of the previous file must not stay selectable against the empty store
+        self.display_results([])
+        self.message_preview.clear()
+
+        # A loader for a previous file may still be running; stop it and ignore
+        # its signals from now on, but the thread must not be destroyed mid-run
+        if self.loader is not None:
+            self.loader.requestInterruption()
+            self._retired_loaders.append(self.loader)
+        self._retired_loaders = [loader for loader in self._retired_loaders if loader.isRunning()]
+
         self.loader = MBoxLoader(file_path)
         self.loader.progress.connect(self.update_progress)
         self.loader.status.connect(self.update_status)
+        self.loader.headers_loaded.connect(self.headers_loaded)
         self.loader.finished.connect(self.loading_finished)
         self.loader.error.connect(self.loading_error)
         self.loader.start()
 
+    def is_current_loader(self) -> bool:
+        """Whether the signal being handled came from the loader of the current file."""
+        return self.sender() is self.loader
+
     def update_progress(self, value: int):
         """Update the progress bar."""
+        if not self.is_current_loader():
+            return
         self.progress_bar.setValue(value)
 
     def update_status(self, message: str):
         """Update the status bar with the current operation."""
+        if not self.is_current_loader():
+            return
         self.statusBar().showMessage(message)
 
-    def loading_finished(self, messages: List[EmailMessage]):
+    def set_store(self, store: MessageStore):
+        """Switch to a newly loaded message store, mapping its mbox file for previews."""
+        self.store = store
+        if self._mm is None:
+            if len(store):
+                self._mm = _map_file(self.mbox_path)
+            # Decoded bodies are only valid for the file they came from
+            self._body_cache = lru_cache(maxsize=256)(self.read_body)
+
+    def read_body(self, index: int) -> str:
+        """Decode the body of a message straight from the mapped mbox file."""
+        raw = self._mm[self.store.starts[index]:self.store.ends[index]]
+        return _message_body(_parse_bytes(raw))
+
+    def headers_loaded(self, store: MessageStore):
+        """Show the message list as soon as headers are available."""
+        if not self.is_current_loader():
+            return
+        self.set_store(store)
+        self.search()
+        self.statusBar().showMessage(f"Loaded {len(store)} message headers, indexing bodies...")
+
+    def loading_finished(self, store: MessageStore):
         """Handle completion of mbox loading."""
-        self.messages = messages
+        if not self.is_current_loader():
+            return
+        self.set_store(store)
         self.progress_bar.setVisible(False)
-        self.statusBar().showMessage(f"Loaded {len(messages)} messages")
         self.search()  # Perform initial search to show all messages
+        # Reported after the search so its "Found N results" doesn't hide it
+        message = f"Loaded {len(store)} messages"
+        if self.loader.unknown_charsets:
+            message += f"; unknown charsets decoded as UTF-8: {', '.join(sorted(self.loader.unknown_charsets))}"
+        self.statusBar().showMessage(message)
 
     def loading_error(self, error_msg: str):
         """Handle loading errors."""
+        if not self.is_current_loader():
+            return
         self.progress_bar.setVisible(False)
         QMessageBox.critical(self, "Error", f"Error loading mbox file: {error_msg}")
 
     def search(self):
         """Perform the search operation."""
-        query = self.search_input.text().lower()
+        # Everything searchable is stored as case-folded UTF-8, so encode the
+        # query once and compare bytes
+        query = _fold(self.search_input.text()).encode('utf-8', 'surrogatepass')
         search_type = self.search_type.currentText()
-        
-        results = []
-        for message in self.messages:
-            match = False
-            subject = str(message.subject) if not isinstance(message.subject, str) else message.subject
-            body = str(message.body) if not isinstance(message.body, str) else message.body
-            
-            if search_type in ["Subject", "Both"] and query in subject.lower():
-                match = True
-            if search_type in ["Body", "Both"] and query in body.lower():
-                match = True
-                
-            if match:
-                results.append(message)
+        subject_keys = self.store.subject_keys
 
-        self.display_results(results)
+        if search_type != "Subject" and not self.store.has_body_index:
+            # Bodies are still being decoded; search what we have so far
+            results = [i for i, subject in enumerate(subject_keys) if search_type == "Both" and query in subject]
+            self.display_results(results)
+            self.statusBar().showMessage(f"Found {len(results)} results (message bodies are still being indexed)")
+            return
 
-    def display_results(self, results: List[EmailMessage]):
-        """Display search results in the table."""
-        self.results_table.setRowCount(0)
-        
-        for message in results:
-            row = self.results_table.rowCount()
-            self.results_table.insertRow(row)
-            
-            date_str = message.date.strftime("%Y-%m-%d %H:%M") if message.date else "Unknown"
-            self.results_table.setItem(row, 0, QTableWidgetItem(date_str))
-            self.results_table.setItem(row, 1, QTableWidgetItem(str(message.from_addr)))
-            self.results_table.setItem(row, 2, QTableWidgetItem(str(message.subject)))
-            
-            # Store the message object in the first column for reference
-            self.results_table.item(row, 0).setData(Qt.ItemDataRole.UserRole, message)
+        if search_type == "Subject":
+            results = [i for i, subject in enumerate(subject_keys) if query in subject]
+        elif search_type == "Body":
+            results = self.store.search_bodies(query)
+        else:
+            matches = set(self.store.search_bodies(query))
+            matches.update(i for i, subject in enumerate(subject_keys) if query in subject)
+            results = sorted(matches)
+
+        self.display_results(results)
 
+    def display_results(self, results: List[int]):
+        """Display search results (indices into the message store) in the table."""
+        self.results_model.set_results(self.store, results)
         self.statusBar().showMessage(f"Found {len(results)} results")
 
     def show_selected_message(self):
         """Display the selected message in the preview area."""
-        selected_items = self.results_table.selectedItems()
-        if not selected_items:
+        selected_rows = self.results_table.selectionModel().selectedRows()
+        if not selected_rows:
             return
             
-        row = selected_items[0].row()
-        message = self.results_table.item(row, 0).data(Qt.ItemDataRole.UserRole)
+        index = self.results_model.message_index(selected_rows[0].row())
+        subject = self.store.subjects[index]
+        from_addr = self.store.from_addrs[index]
+        date = self.store.dates[index]
+        date_str = date.strftime('%Y-%m-%d %H:%M') if date else 'Unknown'
+        body = self._body_cache(index)
         
-        # Check if the body contains HTML
-        is_html = bool(re.search(r'<[^>]+>', message.body))
+        # Check if the body contains HTML; plain text mail rarely has a '<' at all
+        is_html = '<' in body and bool(_HTML_TAG_RE.search(body))
         
         if is_html:
             # For HTML content, wrap it in a proper HTML document
@@ -407,14 +833,14 @@ class MainWindow(QMainWindow):
                 </style>
             </head>
             <body>
-                <h3>{message.subject}</h3>
+                <h3>{subject}</h3>
                 <div class="header">
-                    <p><b>From:</b> {message.from_addr}</p>
-                    <p><b>Date:</b> {message.date.strftime('%Y-%m-%d %H:%M') if message.date else 'Unknown'}</p>
+                    <p><b>From:</b> {from_addr}</p>
+                    <p><b>Date:</b> {date_str}</p>
                 </div>
                 <hr>
                 <div class="content">
-                    {message.body}
+                    {body}
                 </div>
             </body>
             </html>
@@ -432,13 +858,13 @@ class MainWindow(QMainWindow):
                 </style>
             </head>
             <body>
-                <h3>{message.subject}</h3>
+                <h3>{subject}</h3>
                 <div class="header">
-                    <p><b>From:</b> {message.from_addr}</p>
-                    <p><b>Date:</b> {message.date.strftime('%Y-%m-%d %H:%M') if message.date else 'Unknown'}</p>
+                    <p><b>From:</b> {from_addr}</p>
+                    <p><b>Date:</b> {date_str}</p>
                 </div>
                 <hr>
-                <pre>{message.body}</pre>
+                <pre>{body}</pre>
             </body>
             </html>
             """
@@ -463,4 +889,6 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == "__main__":
+    # Needed for the parser worker processes in frozen builds
+    multiprocessing.freeze_support()
     main() 
\ No newline at end of file